@@ -5,7 +5,7 @@ from bleak import BleakScanner, BleakClient
 from bleak.uuids import normalize_uuid_16
 from bleak.backends.device import BLEDevice
 
-from uplift import Desk, discover
+from uplift import Desk, discover_first
 
 
 timeout = 10.0
@@ -33,16 +33,11 @@ async def async_notify_callback_height(desk: Desk):
 
 
 async def main():
-    print("Attempting to discover desks...")
-    desks: list[BLEDevice] = await discover()
-    if len(desks) == 0:
+    print("Attempting to discover a desk...")
+    first_desk: BLEDevice | None = await discover_first()
+    if first_desk is None:
         print("No desks found")
         return
-    print(f"Found {len(desks)} desk(s)")
-    for desk in desks:
-        print(f"    - {desk.name} - {desk.address}")
-
-    first_desk = desks[0]
     print(f"Connecting to {first_desk.name} - {first_desk.address}...")
 
     async with BleakClient(first_desk) as bleak_client:
@@ -10,11 +10,17 @@ from bleak import BleakScanner, BleakClient, BleakGATTCharacteristic
 from bleak.exc import BleakDBusError
 from bleak.uuids import normalize_uuid_16
 from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+from bleak.backends.service import BleakGATTServiceCollection
 from typing import Self
+import asyncio
+import logging
 import time
 
 from .utils import height_conv_to_in
 
+_LOGGER = logging.getLogger(__name__)
+
 # --- Service UUIDs ---
 # The block FE60 is allocated to Lierda Science & Technology Group Co., Ltd.
 _service_vendor_discovery = normalize_uuid_16(0xFE60)
@@ -42,19 +48,95 @@ class DeskCommand(Enum):
     REQUEST_STATUS = bytes([0xF1, 0xF1, 0x07, 0x00, 0x07, 0x7E])
 
 
+_WAKE = DeskCommand.WAKE.value
+
 _scanner_timeout = 10.0
+# The desk goes back to sleep roughly 10 seconds after the last command; stay a bit under that.
+_awake_window = 8.0
+# How long read_height waits for a height notification before falling back to a read.
+_height_notify_timeout = 2.0
 
 
-def discover(scanner: BleakScanner = None) -> list[BLEDevice]:
+async def discover(scanner: BleakScanner = None) -> list[BLEDevice]:
     if scanner is None:
         scanner = BleakScanner()
 
-    return scanner.discover(
+    return await scanner.discover(
         timeout=_scanner_timeout, service_uuids=[_service_vendor_discovery]
     )
 
 
+async def discover_first(timeout: float = _scanner_timeout) -> BLEDevice | None:
+    # Return as soon as any desk advertises itself instead of scanning for the full timeout
+    found: list[BLEDevice] = []
+    event = asyncio.Event()
+
+    def detection_callback(device: BLEDevice, advertisement_data: AdvertisementData):
+        if found or _service_vendor_discovery not in advertisement_data.service_uuids:
+            return
+        found.append(device)
+        event.set()
+
+    scanner = BleakScanner(
+        detection_callback=detection_callback,
+        service_uuids=[_service_vendor_discovery],
+    )
+    async with scanner:
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    return found[0]
+
+
+async def _run_callbacks(desk: Desk, callbacks: list[callable]) -> None:
+    # Run every callback to completion and report failures individually, so one
+    # failing callback neither stops the others nor goes unobserved
+    results = await asyncio.gather(
+        *(callback(desk) for callback in callbacks), return_exceptions=True
+    )
+    for callback, result in zip(callbacks, results):
+        if isinstance(result, Exception):
+            _LOGGER.error(
+                "Error in notification callback %r", callback, exc_info=result
+            )
+
+
+async def _stop_notify_quietly(
+    client: BleakClient, char_specifier: BleakGATTCharacteristic | str
+) -> None:
+    try:
+        await client.stop_notify(char_specifier)
+    except BleakDBusError:
+        pass
+
+
 class Desk:
+    __slots__ = (
+        "address",
+        "name",
+        "_height",
+        "bleak_client",
+        "_moving",
+        "_moving_deadline",
+        "_awake_until",
+        "_height_notify_services",
+        "_height_event",
+        "_pending_notify_task",
+        "_stable_count",
+        "_last_height_sample",
+        "_last_raw",
+        "_resolved_services",
+        "_control_char",
+        "_height_char",
+        "_name_char",
+        "_device_name_char",
+        "_notification_callbacks_desk_name",
+        "_notification_callbacks_height",
+        "__weakref__",
+    )
+
     def __init__(
         self, address: str, name: str, bleak_client: BleakClient = None
     ) -> Self:
@@ -63,7 +145,19 @@ class Desk:
         self._height: float = 0.0
         self.bleak_client = bleak_client
         self._moving = False
-        self._last_heights = []
+        self._moving_deadline = 0.0
+        self._awake_until = 0.0
+        self._height_notify_services: BleakGATTServiceCollection | None = None
+        self._height_event = asyncio.Event()
+        self._pending_notify_task: asyncio.Task | None = None
+        self._stable_count = 0
+        self._last_height_sample: float | None = None
+        self._last_raw: bytes | None = None
+        self._resolved_services: BleakGATTServiceCollection | None = None
+        self._control_char: BleakGATTCharacteristic | str = _char_vendor_desk_control
+        self._height_char: BleakGATTCharacteristic | str = _char_vendor_desk_height
+        self._name_char: BleakGATTCharacteristic | str = _char_vendor_desk_name
+        self._device_name_char: BleakGATTCharacteristic | str = _char_std_device_name
         self._notification_callbacks_desk_name: list[callable] = []
         self._notification_callbacks_height: list[callable] = []
 
@@ -80,22 +174,61 @@ class Desk:
 
         if client is None:
             raise RuntimeError("No bleak client provided")
+        if client.services is not self._resolved_services:
+            self._resolve_characteristics(client)
         return client
 
+    def _resolve_characteristics(self, client: BleakClient) -> None:
+        # Look the characteristics up once per connection so writes and reads don't
+        # have to resolve the UUID against the service table every time. A reconnect
+        # rebuilds the service collection, so that is what the cache is keyed on.
+        services = client.services
+        self._control_char = (
+            services.get_characteristic(_char_vendor_desk_control)
+            or _char_vendor_desk_control
+        )
+        self._height_char = (
+            services.get_characteristic(_char_vendor_desk_height)
+            or _char_vendor_desk_height
+        )
+        self._name_char = (
+            services.get_characteristic(_char_vendor_desk_name)
+            or _char_vendor_desk_name
+        )
+        self._device_name_char = (
+            services.get_characteristic(_char_std_device_name)
+            or _char_std_device_name
+        )
+        self._resolved_services = services
+
     def _set_moving(self, value: bool):
         self._moving = value
-        self._last_action_time = time.time()
+        self._moving_deadline = time.monotonic() + 1.0
 
     async def _send_desk_control_command(
         self, command: DeskCommand, bleak_client: BleakClient = None
     ) -> None:
         client = self._get_client(bleak_client)
-        self._last_action_time = time.time()
-        if command is not DeskCommand.WAKE:
-            await client.write_gatt_char(
-                _char_vendor_desk_control, DeskCommand.WAKE.value, False
+        control_char = self._control_char
+        payload = command.value
+        now = time.monotonic()
+        self._moving_deadline = now + 1.0
+        if command is DeskCommand.WAKE or now < self._awake_until:
+            # The desk is still awake from a recent command, so skip the wake write
+            await client.write_gatt_char(control_char, payload, False)
+        else:
+            # Both writes are without response, so submit them together rather than
+            # waiting on the wake write before queueing the command
+            results = await asyncio.gather(
+                client.write_gatt_char(control_char, _WAKE, False),
+                client.write_gatt_char(control_char, payload, False),
+                return_exceptions=True,
             )
-        await client.write_gatt_char(_char_vendor_desk_control, command.value, False)
+            # Wait for both writes to settle so neither failure goes unobserved
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        self._awake_until = now + _awake_window
 
     async def awaken(self, bleak_client: BleakClient = None) -> None:
         await self._send_desk_control_command(DeskCommand.WAKE, bleak_client)
@@ -124,29 +257,56 @@ class Desk:
         await self._send_desk_control_command(DeskCommand.REQUEST_STATUS, bleak_client)
 
     async def start_notify(self, bleak_client: BleakClient = None) -> None:
-        client = bleak_client or self.bleak_client
+        client = self._get_client(bleak_client)
 
-        await client.start_notify(
-            _char_vendor_desk_name, self._notify_callback_desk_name
-        )
-        await client.start_notify(
-            _char_vendor_desk_height, self._notify_callback_height
+        chars = (self._name_char, self._height_char)
+        results = await asyncio.gather(
+            client.start_notify(self._name_char, self._notify_callback_desk_name),
+            client.start_notify(self._height_char, self._notify_callback_height),
+            return_exceptions=True,
         )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # Don't leave the connection half subscribed
+            await asyncio.gather(
+                *(
+                    _stop_notify_quietly(client, char)
+                    for char, result in zip(chars, results)
+                    if not isinstance(result, BaseException)
+                ),
+                return_exceptions=True,
+            )
+            raise errors[0]
+
+        # Remember the connection notifications were started on; a different client or
+        # a reconnect (which rebuilds the services) will not be delivering them
+        self._height_notify_services = client.services
 
     async def stop_notify(self, bleak_client: BleakClient = None) -> None:
-        client = bleak_client or self.bleak_client
+        client = self._get_client(bleak_client)
 
-        if client is None:
-            raise Exception("No bleak client provided")
+        if client.services is self._height_notify_services:
+            self._height_notify_services = None
+        results = await asyncio.gather(
+            _stop_notify_quietly(client, self._name_char),
+            _stop_notify_quietly(client, self._height_char),
+            return_exceptions=True,
+        )
 
-        try:
-            await client.stop_notify(_char_vendor_desk_height)
-        except BleakDBusError:
-            pass
+        # Make sure no height callbacks are still running once notifications are off
+        task = self._pending_notify_task
+        if task is not None:
+            self._pending_notify_task = None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
     async def read_device_name(self, bleak_client: BleakClient = None) -> str:
         client = self._get_client(bleak_client)
-        data = await client.read_gatt_char(_char_std_device_name)
+        data = await client.read_gatt_char(self._device_name_char)
         name = data.decode("utf-8", errors="ignore")
         return name
 
@@ -162,30 +322,54 @@ class Desk:
         header = bytes([0x01, 0xFC, 0x07, len(name_bytes)])
         packet = header + name_bytes
 
-        self._last_action_time = time.time()
-        await client.write_gatt_char(_char_vendor_desk_name, packet, False)
+        self._moving_deadline = time.monotonic() + 1.0
+        await client.write_gatt_char(self._name_char, packet, False)
 
     async def read_height(self, bleak_client: BleakClient = None) -> float:
         client = self._get_client(bleak_client)
 
+        self._height_event.clear()
         await self.request_status(client)
-        self._last_action_time = time.time()
+
+        # The desk answers a status request with a height notification, so when
+        # notifications are running there is no need for a separate read
+        if client.services is self._height_notify_services:
+            try:
+                await asyncio.wait_for(
+                    self._height_event.wait(), timeout=_height_notify_timeout
+                )
+                return self.height
+            except asyncio.TimeoutError:
+                pass
+
         self._height = height_conv_to_in(
-            await client.read_gatt_char(_char_vendor_desk_height)
+            await client.read_gatt_char(self._height_char)
         )
         return self.height
 
+    # The callback lists are rebound rather than mutated so that a notification
+    # already fanning out keeps iterating over the list it started with.
     def register_callback_desk_name(self, callback: callable) -> None:
-        self._notification_callbacks_desk_name.append(callback)
+        self._notification_callbacks_desk_name = [
+            *self._notification_callbacks_desk_name,
+            callback,
+        ]
 
     def deregister_callback_desk_name(self, callback: callable) -> None:
-        self._notification_callbacks_desk_name.remove(callback)
+        callbacks = list(self._notification_callbacks_desk_name)
+        callbacks.remove(callback)
+        self._notification_callbacks_desk_name = callbacks
 
     def register_callback_height(self, callback: callable) -> None:
-        self._notification_callbacks_height.append(callback)
+        self._notification_callbacks_height = [
+            *self._notification_callbacks_height,
+            callback,
+        ]
 
     def deregister_callback_height(self, callback: callable) -> None:
-        self._notification_callbacks_height.remove(callback)
+        callbacks = list(self._notification_callbacks_height)
+        callbacks.remove(callback)
+        self._notification_callbacks_height = callbacks
 
     def __str__(self):
         return f"{self.name} - {self.address}"
@@ -198,31 +382,54 @@ class Desk:
         # - 0xFC, 0x07 - The write command opcode; the same as was sent in the write command header
         # - 0x01 - A "success" status code
         # - 0x00 - A checksum or zero-padding
-        for callback in self._notification_callbacks_desk_name:
-            await callback(self)
+        callbacks = self._notification_callbacks_desk_name
+        if callbacks:
+            await _run_callbacks(self, callbacks)
 
     async def _notify_callback_height(
         self, sender: BleakGATTCharacteristic, data: bytearray
     ):
-        self._height = height_conv_to_in(data)
-
-        if len(self._last_heights) > 0 and self._last_heights[-1] != self._height:
-            self._set_moving(True)
-
-        self._last_heights.append(self._height)
-        if len(self._last_heights) > 4:
+        # A still desk keeps sending the same packet, so only convert when it changes.
+        # Repeats still go through the rest of the bookkeeping since they are what
+        # tells us the desk has stopped.
+        if data == self._last_raw:
+            new_h = self._last_height_sample
+        else:
+            new_h = height_conv_to_in(data)
+            self._last_raw = bytes(data)
+        self._height = new_h
+        self._height_event.set()
+
+        last_h = self._last_height_sample
+        self._last_height_sample = new_h
+
+        if new_h != last_h:
+            self._stable_count = 0
+            if last_h is not None:
+                self._set_moving(True)
+        else:
+            self._stable_count += 1
+            # Only set moving to false if we've been moving for more than 1 second (sometimes the first few height updates are the same)
             if (
-                self.moving
-                and self._last_action_time + 1
-                < time.time()  # Only set moving to false if we've been moving for more than 1 second (sometimes the first few height updates are the same)
-                and self._last_heights[0] == self._height
-                and self._last_heights[1] == self._height
-                and self._last_heights[2] == self._height
-                and self._last_heights[3] == self._height
+                self._moving
+                and self._stable_count >= 4
+                and time.monotonic() >= self._moving_deadline
             ):
                 self._set_moving(False)
 
-            self._last_heights.pop(0)
-
-        for callback in self._notification_callbacks_height:
-            await callback(self)
+        if not self._notification_callbacks_height:
+            return
+
+        # Callbacks only ever see the latest state, so if a previous fan-out is still
+        # running just let it pick up the new height rather than queueing another
+        if self._pending_notify_task is None or self._pending_notify_task.done():
+            self._pending_notify_task = asyncio.create_task(self._fan_out_latest())
+
+    async def _fan_out_latest(self):
+        while True:
+            state = (self._height, self._moving)
+            callbacks = self._notification_callbacks_height
+            if callbacks:
+                await _run_callbacks(self, callbacks)
+            if state == (self._height, self._moving):
+                return
@@ -1,2 +1,14 @@
+from array import array
+
+# Heights come over the wire as tenths of an inch. Precompute the conversion for every
+# value a desk could realistically report so notifications only need a table lookup.
+_height_table = array("d", (raw / 10.0 for raw in range(1 << 12)))
+
+
 def height_conv_to_in(height_bytes: bytearray) -> float:
-    return int.from_bytes(height_bytes[-5:-3], "big") / 10.0
\ No newline at end of file
+    if len(height_bytes) < 5:
+        return int.from_bytes(height_bytes[-5:-3], "big") / 10.0
+    raw = (height_bytes[-5] << 8) | height_bytes[-4]
+    if raw < len(_height_table):
+        return _height_table[raw]
+    return raw / 10.0
\ No newline at end of file